@@ -0,0 +1,38 @@
+# serialization.py
+import json
+from dataclasses import is_dataclass
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library encoder
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    if is_dataclass(obj):
+        # Shallow conversion; nested values are handled by the encoder itself
+        return {name: getattr(obj, name) for name in obj.__dataclass_fields__}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializes content to compact JSON bytes, natively handling dataclasses.
+
+    Args:
+        content (Any): The content to serialize.
+
+    Returns:
+        bytes: UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that bypasses FastAPI's jsonable_encoder and renders the content directly.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
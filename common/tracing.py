@@ -0,0 +1,252 @@
+# tracing.py
+import contextvars
+import itertools
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # OpenTelemetry is optional
+    otel_trace = None
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# Attributes (in order) used to label a span in the Server-Timing header
+LABEL_ATTRIBUTES = ("task", "handler", "attempt")
+
+
+class Span:
+    """
+    A single timed stage within a trace.
+
+    Attributes:
+        name (str): Name of the stage (e.g. "generate_prompts", "handler_call").
+        span_id (int): Identifier of the span, unique within its trace.
+        parent_id (Optional[int]): Identifier of the enclosing span, None for top-level spans.
+        parent (Optional[Span]): The enclosing span, None for top-level spans.
+        attributes (Dict[str, Any]): Additional key/value pairs describing the span.
+        start (float): Start time as returned by time.perf_counter().
+        end (Optional[float]): End time as returned by time.perf_counter(), None while running.
+        status (str): "ok" or "error".
+    """
+    def __init__(self, name: str, span_id: int, parent: Optional["Span"], attributes: Dict[str, Any], start: float):
+        self.name = name
+        self.span_id = span_id
+        self.parent = parent
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = start
+        self.end: Optional[float] = None
+        self.status = "ok"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    @property
+    def label(self) -> str:
+        # Label attributes missing on the span are taken from the nearest enclosing span that has them,
+        # e.g. provider_call inherits the task and handler of its handler_call
+        values = {}
+        span = self
+        while span is not None and len(values) < len(LABEL_ATTRIBUTES):
+            for key in LABEL_ATTRIBUTES:
+                if key in span.attributes:
+                    values.setdefault(key, span.attributes[key])
+            span = span.parent
+        return "/".join(str(values[key]) for key in LABEL_ATTRIBUTES if key in values)
+
+
+class Trace:
+    """
+    Collects the spans recorded while serving a single request.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.start = time.perf_counter()
+        self.start_unix_ns = time.time_ns()
+        self.end: Optional[float] = None
+        self._span_ids = itertools.count(1)
+
+    def next_span_id(self) -> int:
+        return next(self._span_ids)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_unix_ns(self, perf_time: float) -> int:
+        return self.start_unix_ns + int((perf_time - self.start) * 1e9)
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """
+        Returns the finished spans as a list of dictionaries ordered by start time.
+
+        Returns:
+            List[Dict[str, Any]]: Name, offset from the start of the trace, duration and attributes of each span.
+        """
+        finished = sorted((span for span in self.spans if span.end is not None), key=lambda span: span.start)
+        return [
+            {
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "offset_ms": round((span.start - self.start) * 1000, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "status": span.status,
+                "attributes": span.attributes,
+            }
+            for span in finished
+        ]
+
+    def server_timing(self) -> str:
+        """
+        Formats the finished spans as a Server-Timing header value.
+
+        Returns:
+            str: Comma separated metrics, one per span, followed by the total request duration.
+        """
+        metrics = []
+        for span in sorted((span for span in self.spans if span.end is not None), key=lambda span: span.start):
+            metric = span.name
+            if span.label:
+                metric += f';desc="{span.label}"'
+            metrics.append(f"{metric};dur={span.duration_ms:.1f}")
+        metrics.append(f"total;dur={self.duration_ms:.1f}")
+        return ", ".join(metrics)
+
+
+class InMemoryExporter:
+    """
+    Default exporter, keeps the most recent traces in process.
+    """
+    def __init__(self, max_traces: int = 100):
+        self.traces: Deque[Trace] = deque(maxlen=max_traces)
+
+    def export(self, trace: Trace) -> None:
+        self.traces.append(trace)
+        logging.debug(f"Trace {trace.trace_id} ({trace.name}) finished in {trace.duration_ms:.1f} ms with {len(trace.spans)} spans")
+
+
+class OpenTelemetryExporter:
+    """
+    Replays finished traces into the globally configured OpenTelemetry tracer provider.
+    """
+    def __init__(self, service_name: str = "item-setup-playground"):
+        if otel_trace is None:
+            raise ImportError("opentelemetry-api is required for the OpenTelemetry exporter")
+        self.tracer = otel_trace.get_tracer(service_name)
+
+    def export(self, trace: Trace) -> None:
+        root = self.tracer.start_span(trace.name, start_time=trace.start_unix_ns)
+        otel_spans = {None: root}
+        for span in sorted((span for span in trace.spans if span.end is not None), key=lambda span: span.start):
+            parent = otel_spans.get(span.parent_id, root)
+            otel_span = self.tracer.start_span(
+                span.name,
+                context=otel_trace.set_span_in_context(parent),
+                attributes={key: str(value) for key, value in span.attributes.items()},
+                start_time=trace.to_unix_ns(span.start),
+            )
+            if span.status == "error":
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+            otel_span.end(end_time=trace.to_unix_ns(span.end))
+            otel_spans[span.span_id] = otel_span
+        root.end(end_time=trace.to_unix_ns(trace.end))
+
+
+class NoOpExporter:
+    def export(self, trace: Trace) -> None:
+        pass
+
+
+class Tracer:
+    """
+    Lightweight request tracer. Spans are only recorded while a trace is active,
+    so instrumented code paths are no-ops outside of a request.
+    """
+    def __init__(self, exporter=None):
+        self.exporter = exporter or InMemoryExporter()
+
+    @staticmethod
+    def current_trace() -> Optional[Trace]:
+        return _current_trace.get()
+
+    @contextmanager
+    def start_trace(self, name: str) -> Iterator[Trace]:
+        trace = Trace(name)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            yield trace
+        finally:
+            trace.end = time.perf_counter()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            try:
+                self.exporter.export(trace)
+            except Exception as e:
+                logging.error(f"Error exporting trace {trace.trace_id}: {str(e)}")
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+        span = Span(name, trace.next_span_id(), _current_span.get(), attributes, time.perf_counter())
+        trace.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+
+    def record_span(self, name: str, start: float, end: float, **attributes) -> Optional[Span]:
+        """
+        Records an already measured interval (e.g. executor queue wait) as a child of the current span.
+
+        Args:
+            name (str): Name of the span.
+            start (float): Start time as returned by time.perf_counter().
+            end (float): End time as returned by time.perf_counter().
+
+        Returns:
+            Optional[Span]: The recorded span, or None when no trace is active.
+        """
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        span = Span(name, trace.next_span_id(), _current_span.get(), attributes, start)
+        span.end = end
+        trace.spans.append(span)
+        return span
+
+
+def create_exporter(exporter_name: str):
+    if exporter_name == "memory":
+        return InMemoryExporter()
+    elif exporter_name == "otel":
+        return OpenTelemetryExporter()
+    elif exporter_name == "none":
+        return NoOpExporter()
+    else:
+        logging.error(f"Unsupported tracing exporter: {exporter_name}")
+        raise ValueError(f"Unsupported tracing exporter: {exporter_name}")
+
+
+tracer = Tracer(exporter=create_exporter(os.getenv("TRACING_EXPORTER", "memory")))
@@ -0,0 +1,167 @@
+# entrypoint/admission_controller.py
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from exceptions.custom_exceptions import AdmissionRejectedException
+from common.tracing import tracer
+
+# Priority classes, highest priority first
+PRIORITY_CLASSES = ("interactive", "bulk")
+
+
+class _Waiter:
+    __slots__ = ("cost", "priority", "future")
+
+    def __init__(self, cost: int, priority: str, future: asyncio.Future):
+        self.cost = cost
+        self.priority = priority
+        self.future = future
+
+
+class AdmissionController:
+    """
+    Bounds the number of handler calls in flight across all requests.
+
+    Each request reserves its number of handler calls before it is processed. Requests that do not fit are
+    queued per priority class and admitted in strict priority order (FIFO within a class). A request is
+    rejected with 429 if its class queue is full and with 503 if it waited longer than its class allows;
+    both carry an estimated Retry-After.
+    """
+    def __init__(self, max_in_flight_calls: int = 64, max_queue_wait: Optional[Dict[str, float]] = None,
+                 max_queued_requests: Optional[Dict[str, int]] = None,
+                 max_in_flight_share: Optional[Dict[str, float]] = None):
+        self.max_in_flight_calls = max_in_flight_calls
+        self.max_queue_wait = {"interactive": 5.0, "bulk": 30.0, **(max_queue_wait or {})}
+        self.max_queued_requests = {"interactive": 100, "bulk": 1000, **(max_queued_requests or {})}
+        # Bulk traffic may only use part of the budget, keeping headroom for interactive requests
+        share = {"interactive": 1.0, "bulk": 0.75, **(max_in_flight_share or {})}
+        self.class_limits = {priority: max(1, int(max_in_flight_calls * share[priority])) for priority in PRIORITY_CLASSES}
+
+        self.in_flight = 0
+        self.class_in_flight = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._queues: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in PRIORITY_CLASSES}
+        # Recent durations for which admitted requests held their reservation, used to estimate Retry-After
+        self._hold_times: Deque[float] = deque(maxlen=100)
+        self._stats = {priority: {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+                       for priority in PRIORITY_CLASSES}
+
+    @asynccontextmanager
+    async def admit(self, cost: int, priority: str = "interactive") -> AsyncIterator[None]:
+        """
+        Reserves `cost` handler calls for the duration of the context, waiting for capacity if needed.
+
+        Args:
+            cost (int): Number of handler calls the request will make.
+            priority (str): Priority class of the request, see PRIORITY_CLASSES.
+
+        Raises:
+            ValueError: If the priority class is unknown.
+            AdmissionRejectedException: If the request cannot be admitted.
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unsupported priority class: {priority}")
+        # A request larger than the whole budget would never fit; let it run alone instead
+        cost = max(1, min(cost, self.class_limits[priority]))
+        with tracer.span("admission_wait", priority=priority):
+            await self._acquire(cost, priority)
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold_times.append(time.monotonic() - start_time)
+            self._release(cost, priority)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight_calls": self.max_in_flight_calls,
+            "in_flight_calls": self.in_flight,
+            "classes": {
+                priority: {
+                    **self._stats[priority],
+                    "in_flight_calls": self.class_in_flight[priority],
+                    "waiting": len(self._queues[priority]),
+                }
+                for priority in PRIORITY_CLASSES
+            },
+        }
+
+    async def _acquire(self, cost: int, priority: str) -> None:
+        if not self._has_waiters_ahead(priority) and self._fits(cost, priority):
+            self._reserve(cost, priority)
+            return
+
+        queue = self._queues[priority]
+        if len(queue) >= self.max_queued_requests[priority]:
+            self._stats[priority]["rejected_queue_full"] += 1
+            logging.warning(f"Rejecting {priority} request: queue is full ({len(queue)} waiting)")
+            raise AdmissionRejectedException(429, self._retry_after(cost), f"too many queued {priority} requests")
+
+        waiter = _Waiter(cost, priority, asyncio.get_running_loop().create_future())
+        queue.append(waiter)
+        self._stats[priority]["queued"] += 1
+        try:
+            done, _ = await asyncio.wait({waiter.future}, timeout=self.max_queue_wait[priority])
+        except BaseException:
+            # Cancelled while waiting (e.g. client disconnected)
+            self._abandon(waiter)
+            raise
+        if not done:
+            self._abandon(waiter)
+            self._stats[priority]["rejected_timeout"] += 1
+            logging.warning(f"Rejecting {priority} request: waited more than {self.max_queue_wait[priority]} seconds")
+            raise AdmissionRejectedException(503, self._retry_after(cost), "service is saturated")
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter.future.done():
+            # Capacity was granted just as the wait ended
+            self._release(waiter.cost, waiter.priority)
+        else:
+            waiter.future.cancel()
+            self._queues[waiter.priority].remove(waiter)
+            # The abandoned waiter may have been blocking smaller requests behind it
+            self._grant_waiters()
+
+    def _release(self, cost: int, priority: str) -> None:
+        self.in_flight -= cost
+        self.class_in_flight[priority] -= cost
+        self._grant_waiters()
+
+    def _grant_waiters(self) -> None:
+        # Strict priority: only the head of the highest priority non-empty queue may be admitted
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            while queue and self._fits(queue[0].cost, priority):
+                waiter = queue.popleft()
+                self._reserve(waiter.cost, priority)
+                waiter.future.set_result(None)
+            if queue:
+                return
+
+    def _reserve(self, cost: int, priority: str) -> None:
+        self.in_flight += cost
+        self.class_in_flight[priority] += cost
+        self._stats[priority]["admitted"] += 1
+
+    def _fits(self, cost: int, priority: str) -> bool:
+        return (self.in_flight + cost <= self.max_in_flight_calls
+                and self.class_in_flight[priority] + cost <= self.class_limits[priority])
+
+    def _has_waiters_ahead(self, priority: str) -> bool:
+        for queued_priority in PRIORITY_CLASSES:
+            if self._queues[queued_priority]:
+                return True
+            if queued_priority == priority:
+                return False
+        return False
+
+    def _retry_after(self, cost: int) -> int:
+        # Time for the budget to drain the work already queued ahead, based on recent hold times
+        mean_hold_time = sum(self._hold_times) / len(self._hold_times) if self._hold_times else 1.0
+        queued_cost = sum(waiter.cost for queue in self._queues.values() for waiter in queue)
+        return max(1, math.ceil(mean_hold_time * (queued_cost + cost) / self.max_in_flight_calls))
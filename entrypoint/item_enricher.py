@@ -1,14 +1,23 @@
 # item_enricher.py
+import asyncio
 import logging
 from models.llm_request_models import LLMRequest
 from exceptions.custom_exceptions import StylingGuideNotFoundException
+from entrypoint.results_store import compute_item_hash
+from common.tracing import tracer
+
+ENRICHMENT_TASKS = ["title_enhancement", "short_description_enhancement", "long_description_enhancement"]
 
 class ItemEnricher:
-    def __init__(self, llm_manager, prompt_manager):
+    def __init__(self, llm_manager, prompt_manager, near_duplicate_cache=None, results_store=None,
+                 admission_controller=None):
         self.llm_manager = llm_manager
         self.prompt_manager = prompt_manager
+        self.near_duplicate_cache = near_duplicate_cache
+        self.results_store = results_store
+        self.admission_controller = admission_controller
 
-    async def enrich_item(self, request: LLMRequest):
+    async def enrich_item(self, request: LLMRequest, priority: str = "interactive"):
         # Extract request data
         item_title = request.item_title
         short_description = request.short_description
@@ -18,30 +27,84 @@ class ItemEnricher:
         logging.debug(f"Received request for product type: {repr(item_product_type)}")
         # Normalize product type to ensure consistency
 
+        tasks = ENRICHMENT_TASKS
+        item_hash = compute_item_hash(item_title, short_description, long_description, item_product_type)
+
+        # Serve previously computed results for the same item unless a refresh is requested
+        if self.results_store is not None and not request.refresh:
+            with tracer.span("results_store_lookup"):
+                stored_results = await asyncio.to_thread(self.results_store.latest_results, item_hash)
+            stored_results = self.select_stored_results(stored_results, tasks)
+            if stored_results is not None:
+                logging.info(f"Serving stored results for item {item_hash}")
+                return stored_results
+
+        # Reuse the enrichment of a near-duplicate item (e.g. same item in another size/color) if available,
+        # unless a refresh is requested
+        if self.near_duplicate_cache is not None and not request.refresh:
+            with tracer.span("near_duplicate_lookup"):
+                cached_results = self.near_duplicate_cache.lookup(
+                    item_title, short_description, long_description, item_product_type
+                )
+            if cached_results is not None:
+                return cached_results
 
-        
         # Generate prompts
-        tasks = ["title_enhancement", "short_description_enhancement", "long_description_enhancement"]
         prompts_tasks = self.generate_prompts(
             item_title, short_description, long_description,item_product_type, tasks
         )
 
-        # Invoke LLMManager
-        results = await self.invoke_llms(prompts_tasks)
+        # Invoke LLMManager, reserving its handler calls from the global budget first. Results served from
+        # the results store or the near-duplicate cache above make no handler calls and reserve nothing.
+        if self.admission_controller is not None:
+            async with self.admission_controller.admit(self.estimated_calls(), priority):
+                results = await self.invoke_llms(prompts_tasks, item_product_type, item_hash, request.item_id)
+        else:
+            results = await self.invoke_llms(prompts_tasks, item_product_type, item_hash, request.item_id)
+
+        if self.near_duplicate_cache is not None:
+            self.near_duplicate_cache.add(item_title, short_description, long_description, item_product_type, results)
 
         return results
 
     
+    def estimated_calls(self):
+        # Upper bound of handler calls made by enrich_item (route mode fallbacks aside)
+        calls_per_task = 1 if self.llm_manager.routing_mode == "route" else len(self.llm_manager.handlers)
+        return len(ENRICHMENT_TASKS) * calls_per_task
+
     def generate_prompts(self, item_title, short_description, long_description, item_product_type, tasks):
         logging.debug("Generating prompts for the tasks")
-        prompts_tasks = self.prompt_manager.generate_prompts(
-            item_title, short_description, long_description, item_product_type, tasks
-        )
+        with tracer.span("generate_prompts"):
+            prompts_tasks = self.prompt_manager.generate_prompts(
+                item_title, short_description, long_description, item_product_type, tasks
+            )
         logging.debug(f"Generated prompts and tasks: {prompts_tasks}")
         return prompts_tasks
 
-    async def invoke_llms(self, prompts_tasks):
+    def select_stored_results(self, stored_results, tasks):
+        # Stored results are only served if every task is covered: by every handler when fanning out,
+        # by the most recent handler when routing. Results of a handler's previous model are ignored.
+        handlers = self.llm_manager.handlers
+        selected = {}
+        for task in tasks:
+            task_results = [result for result in stored_results.get(task, [])
+                            if result.handler_name in handlers and result.model == handlers[result.handler_name].model]
+            if self.llm_manager.routing_mode == "route":
+                task_results = task_results[:1]
+            else:
+                by_handler = {result.handler_name: result for result in task_results}
+                task_results = [by_handler[name] for name in handlers if name in by_handler]
+                if len(task_results) < len(handlers):
+                    return None
+            if not task_results:
+                return None
+            selected[task] = task_results
+        return selected
+
+    async def invoke_llms(self, prompts_tasks, item_product_type=None, item_hash=None, item_id=None):
         logging.debug(f"Invoking LLMManager with generated prompts and tasks")
-        results = await self.llm_manager.fan_out_calls(prompts_tasks)
+        with tracer.span(self.llm_manager.routing_mode):
+            results = await self.llm_manager.dispatch_calls(prompts_tasks, item_product_type, item_hash, item_id)
         logging.info(f"LLMManager invocation successful. Results: {results}")
         return results
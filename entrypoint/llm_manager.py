@@ -1,61 +1,126 @@
 # llm_manager.py
 import asyncio
 import logging
-from typing import Dict, List, Any
+import time
+from typing import Dict, List, Any, Optional
 from models.llm_request_models import BaseLLMRequest
+from models.llm_response_models import HandlerResult, EnrichmentResults
 from handlers.llm_handler import BaseModelHandler
+from entrypoint.model_router import ModelRouter
+from entrypoint.results_store import create_record
+from common.tracing import tracer
+
+ROUTING_MODES = ("fan_out", "route")
 
 class LLMManager:
-    def __init__(self, config):
+    def __init__(self, config, results_store=None):
         self.handlers = {}
+        self.results_store = results_store
+        handler_costs = {}
         for provider_config in config['providers']:
             provider_config_copy = provider_config.copy()
             name = provider_config_copy.pop('name')
+            handler_costs[name] = provider_config_copy.pop('cost_per_1k_tokens', 0.0)
             self.handlers[name] = BaseModelHandler(**provider_config_copy)
         logging.debug(f"Initialized handlers: {list(self.handlers.keys())}")
 
-    async def fan_out_calls(self, prompts_tasks: List[Dict[str, Any]]):
+        # Observations are recorded in both modes; in "route" mode they pick one handler per task
+        routing_config = config.get('routing', {}).copy()
+        self.routing_mode = routing_config.pop('mode', 'fan_out')
+        if self.routing_mode not in ROUTING_MODES:
+            raise ValueError(f"Unsupported routing mode: {self.routing_mode}")
+        self.router = ModelRouter(handler_costs=handler_costs, **routing_config)
+        logging.debug(f"Routing mode: {self.routing_mode}")
+
+    async def dispatch_calls(self, prompts_tasks: List[Dict[str, Any]], product_type: Optional[str] = None,
+                             item_hash: Optional[str] = None, item_id: Optional[str] = None) -> EnrichmentResults:
+        if self.routing_mode == "route":
+            return await self.route_calls(prompts_tasks, product_type, item_hash, item_id)
+        return await self.fan_out_calls(prompts_tasks, product_type, item_hash, item_id)
+
+    async def fan_out_calls(self, prompts_tasks: List[Dict[str, Any]], product_type: Optional[str] = None,
+                            item_hash: Optional[str] = None, item_id: Optional[str] = None) -> EnrichmentResults:
         # For each task, fan out to all handlers
-        results = {}
+        results: EnrichmentResults = {}
+        task_names = []
         tasks = []
         for prompt_task in prompts_tasks:
             prompt = prompt_task['prompt']
             task_name = prompt_task['task']
+            results[task_name] = []
             for handler_name, handler in self.handlers.items():
-                tasks.append(self.invoke_handler(handler_name, handler, prompt, task_name))
+                task_names.append(task_name)
+                tasks.append(self.invoke_handler(handler_name, handler, prompt, task_name, product_type, item_hash, item_id))
 
         handler_results = await asyncio.gather(*tasks)
-        # Organize results by task and handler
-        for result in handler_results:
-            task = result['task']
-            handler_name = result['handler_name']
-            if task not in results:
-                results[task] = []
-            results[task].append({
-                'handler_name': handler_name,
-                'model': result['model'],
-                'response': result['response'],
-                'success': result['success']
-            })
+        # Organize results by task, preserving handler order
+        for task_name, result in zip(task_names, handler_results):
+            results[task_name].append(result)
         return results
 
-    async def invoke_handler(self, handler_name, handler, prompt, task):
+    async def route_calls(self, prompts_tasks: List[Dict[str, Any]], product_type: Optional[str] = None,
+                          item_hash: Optional[str] = None, item_id: Optional[str] = None) -> EnrichmentResults:
+        # For each task, call a single handler chosen by the router
+        task_names = [prompt_task['task'] for prompt_task in prompts_tasks]
+        routed_results = await asyncio.gather(*[
+            self.route_task(prompt_task['prompt'], prompt_task['task'], product_type, item_hash, item_id)
+            for prompt_task in prompts_tasks
+        ])
+        return {task_name: [result] for task_name, result in zip(task_names, routed_results)}
+
+    async def route_task(self, prompt, task, product_type=None, item_hash=None, item_id=None) -> HandlerResult:
+        # Try the candidates in ranked order, falling back to the next one on failure
+        result = None
+        for handler_name in self.router.rank(task, product_type):
+            handler = self.handlers.get(handler_name)
+            if handler is None:
+                logging.warning(f"Unknown handler {handler_name} configured as routing candidate for task {task}")
+                continue
+            result = await self.invoke_handler(handler_name, handler, prompt, task, product_type, item_hash, item_id)
+            if result.success:
+                return result
+            logging.warning(f"Handler {handler_name} failed for task {task}, falling back to the next candidate")
+        if result is None:
+            raise ValueError(f"No routing candidates available for task: {task}")
+        return result
+
+    async def invoke_handler(self, handler_name, handler, prompt, task, product_type=None, item_hash=None,
+                             item_id=None) -> HandlerResult:
+        start_time = time.perf_counter()
+        response = None
         try:
-            response = await handler.invoke(request=BaseLLMRequest(prompt=prompt), task=task)
-            return {
-                'handler_name': handler_name,
-                'model': handler.model,
-                'task': task,
-                'response': response['response'],
-                'success': True
-            }
+            with tracer.span("handler_call", task=task, handler=handler_name):
+                response = await handler.invoke(request=BaseLLMRequest(prompt=prompt), task=task)
+            result = HandlerResult(
+                handler_name=handler_name,
+                model=handler.model,
+                response=response['response'],
+                success=True,
+                error=None
+            )
         except Exception as e:
             logging.error(f"Error invoking handler {handler_name} for task {task}: {str(e)}")
-            return {
-                'handler_name': handler_name,
-                'model': handler.model,
-                'task': task,
-                'error': str(e),
-                'response': None,
-                'success': False
-            }
+            result = HandlerResult(
+                handler_name=handler_name,
+                model=handler.model,
+                response=None,
+                success=False,
+                error=str(e)
+            )
+        latency = time.perf_counter() - start_time
+
+        self.router.record(task, product_type, handler_name, latency, result.success,
+                           self._count_tokens(response, prompt) if response else None)
+        if self.results_store is not None and item_hash is not None:
+            self.results_store.record(create_record(
+                item_hash, item_id, product_type, task, result, latency, response.get('usage') if response else None
+            ))
+        return result
+
+    @staticmethod
+    def _count_tokens(response: Dict[str, Any], prompt: str) -> int:
+        usage = response.get('usage')
+        if usage and usage.get('total_tokens'):
+            return usage['total_tokens']
+        # Providers that do not report usage: roughly four characters per token
+        return (len(prompt) + len(response['response'] or "")) // 4
@@ -1,16 +1,23 @@
 # main.py
 import sys
 import os 
+import asyncio
 
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Header, Query
 import uvicorn
 from common.utils import setup_logging, load_config, get_env_variable
+from common.tracing import tracer
+from common.serialization import FastJSONResponse
 import logging
 from models.llm_request_models import LLMRequest
 from entrypoint.llm_manager import LLMManager
 from entrypoint.item_enricher import ItemEnricher  # Import the ItemEnricher class
 from entrypoint.prompt_manager import PromptManager  
-from exceptions.custom_exceptions import StylingGuideNotFoundException
+from entrypoint.near_duplicate_cache import NearDuplicateCache
+from entrypoint.results_store import ResultsStore
+from entrypoint.admission_controller import AdmissionController, PRIORITY_CLASSES
+from exceptions.custom_exceptions import StylingGuideNotFoundException, AdmissionRejectedException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -26,14 +33,30 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Add CORS middleware
+# Frontend origins allowed to call the API and read its timing headers
+CORS_ALLOWED_ORIGINS = ["http://localhost:3000"]  # Update with your frontend URL
+
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    # Record a trace per request and report its stages in the Server-Timing header
+    with tracer.start_trace(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = trace.server_timing()
+    response.headers["X-Trace-Id"] = trace.trace_id
+    # Let the allowed frontend origins read the timings through the Resource Timing API as well
+    response.headers["Timing-Allow-Origin"] = ", ".join(CORS_ALLOWED_ORIGINS)
+    return response
+
+# Add CORS middleware last so that it is outermost and also applies to responses produced by the middleware above
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # Update with your frontend URL
+    allow_origins=CORS_ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "Server-Timing", "X-Trace-Id"],
 )
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: LLMRequest, exc: RequestValidationError):
     logging.error(f"Validation error: {exc.errors()}")
@@ -53,35 +76,101 @@ logging.info("Loading all styling guides at application start-up")
 prompt_manager = PromptManager(styling_guides_dir='styling_guides')
 logging.info(f"Loaded styling guides for product types: {list(prompt_manager.styling_guide_cache.keys())}")
 
+# Optionally persist every handler result so that enrichments can be served and compared across runs
+results_store = None
+results_store_config = config.get('results_store', {}).copy()
+if results_store_config.pop('enabled', False):
+    results_store = ResultsStore(**results_store_config)
+
 # Instantiate LLMManager with the loaded configuration
 logging.debug("Instantiating LLMManager with the loaded configuration")
-llm_manager = LLMManager(config=config)
+llm_manager = LLMManager(config=config, results_store=results_store)
+
+# Optionally reuse enrichments of near-duplicate items
+near_duplicate_cache = None
+near_duplicate_config = config.get('near_duplicate_cache', {}).copy()
+if near_duplicate_config.pop('enabled', False):
+    logging.info(f"Enabling near-duplicate cache with settings: {near_duplicate_config}")
+    near_duplicate_cache = NearDuplicateCache(**near_duplicate_config)
+
+# Bound the handler calls in flight across all requests
+admission_controller = None
+admission_config = config.get('admission', {}).copy()
+if admission_config.pop('enabled', True):
+    logging.info(f"Enabling admission control with settings: {admission_config}")
+    admission_controller = AdmissionController(**admission_config)
 
 # Create an instance of ItemEnricher
-item_enricher = ItemEnricher(llm_manager=llm_manager, prompt_manager=prompt_manager)
+item_enricher = ItemEnricher(llm_manager=llm_manager, prompt_manager=prompt_manager,
+                             near_duplicate_cache=near_duplicate_cache, results_store=results_store,
+                             admission_controller=admission_controller)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if results_store is not None:
+        logging.info("Flushing results store")
+        results_store.close()
 
 # Define the /enrich-item endpoint
-@app.post("/enrich-item")
-async def enrich_item_endpoint(request: LLMRequest):
+@app.post("/enrich-item", response_class=FastJSONResponse)
+async def enrich_item_endpoint(request: LLMRequest, include_timings: bool = False,
+                               x_priority: str = Header("interactive")):
     try:
         # Validate request fields
         validate_request_fields(request)
+        if x_priority not in PRIORITY_CLASSES:
+            raise HTTPException(status_code=400, detail=f"Unsupported priority class: {x_priority}")
 
         # Construct metadata from request fields
 
         # Enrich the item using the ItemEnricher class
-        results = await item_enricher.enrich_item(request)
+        results = await item_enricher.enrich_item(request, priority=x_priority)
 
-        return results
+        if include_timings:
+            # Optional per-stage breakdown of the current trace
+            trace = tracer.current_trace()
+            return FastJSONResponse(content={"results": results, "timings": trace.breakdown() if trace else []})
+        return FastJSONResponse(content=results)
     except StylingGuideNotFoundException as e:
         logging.error(str(e))
         raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejectedException as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except HTTPException as he:
         raise he
     except Exception as e:
         logging.error(f"Error during item enrichment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.get("/near-duplicate-cache/stats")
+async def near_duplicate_cache_stats_endpoint():
+    if near_duplicate_cache is None:
+        raise HTTPException(status_code=404, detail="Near-duplicate cache is not enabled")
+    return near_duplicate_cache.stats()
+
+@app.get("/admission/stats")
+async def admission_stats_endpoint():
+    if admission_controller is None:
+        raise HTTPException(status_code=404, detail="Admission control is not enabled")
+    return admission_controller.stats()
+
+@app.get("/routing/stats")
+async def routing_stats_endpoint():
+    return {"mode": llm_manager.routing_mode, "handlers": llm_manager.router.stats()}
+
+@app.get("/enrichments", response_class=FastJSONResponse)
+async def enrichments_endpoint(item_id: Optional[str] = None, item_hash: Optional[str] = None,
+                               product_type: Optional[str] = None, task: Optional[str] = None,
+                               handler_name: Optional[str] = None,
+                               limit: int = Query(100, ge=1, le=1000)):
+    if results_store is None:
+        raise HTTPException(status_code=404, detail="Results store is not enabled")
+    results = await asyncio.to_thread(
+        results_store.find, limit=limit, item_id=item_id, item_hash=item_hash, product_type=product_type,
+        task=task, handler_name=handler_name
+    )
+    return FastJSONResponse(content=results)
+
 def validate_request_fields(request: LLMRequest):
     required_fields = ['item_title', 'short_description', 'long_description', 'item_product_type']
     missing_fields = [field for field in required_fields if not getattr(request, field, None)]
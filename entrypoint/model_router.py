@@ -0,0 +1,177 @@
+# entrypoint/model_router.py
+
+import logging
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Key under which observations for all product types of a task are aggregated
+ALL_PRODUCT_TYPES = "*"
+
+
+class HandlerStats:
+    """
+    Rolling window of observed calls to a handler for a (task, product type).
+    """
+    __slots__ = ("latencies", "successes", "tokens")
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.successes: Deque[bool] = deque(maxlen=window)
+        self.tokens: Deque[int] = deque(maxlen=window)
+
+    def record(self, latency: float, success: bool, tokens: Optional[int]) -> None:
+        self.successes.append(success)
+        # Failed calls (often fast) say nothing about the latency or tokens of an answer; counting them
+        # would make unreliable handlers look faster and cheaper
+        if success:
+            self.latencies.append(latency)
+            if tokens is not None:
+                self.tokens.append(tokens)
+
+    @property
+    def count(self) -> int:
+        return len(self.successes)
+
+    @property
+    def mean_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return 1 - sum(self.successes) / len(self.successes) if self.successes else 0.0
+
+    @property
+    def mean_tokens(self) -> float:
+        return sum(self.tokens) / len(self.tokens) if self.tokens else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_latency": round(self.mean_latency, 4),
+            "error_rate": round(self.error_rate, 4),
+            "mean_tokens": round(self.mean_tokens, 1),
+        }
+
+
+class ModelRouter:
+    """
+    Chooses which handler should serve a (task, product type) based on the rolling observed latency,
+    error rate and configured per-token cost of each handler.
+
+    The score of a handler is (latency_weight * mean latency in seconds + cost_weight * expected cost in USD)
+    divided by its observed success rate; lower is better. Latency and tokens are taken from successful calls;
+    a handler without any falls back to the means of the other handlers for the task. Handlers with fewer than
+    min_observations calls are ranked first so that they get observed, handlers with an error rate above
+    max_error_rate are ranked last, and a fraction of the traffic (exploration_rate) is sent to a randomly
+    chosen non-preferred handler so that estimates stay fresh and failing handlers are re-probed.
+    """
+    def __init__(self, handler_costs: Dict[str, float], candidates: Optional[Dict[str, List[str]]] = None,
+                 latency_weight: float = 1.0, cost_weight: float = 100.0, exploration_rate: float = 0.1,
+                 window: int = 50, min_observations: int = 3, max_error_rate: float = 0.5,
+                 seed: Optional[int] = None):
+        self.handler_costs = handler_costs
+        self.candidates = candidates or {}
+        self.latency_weight = latency_weight
+        self.cost_weight = cost_weight
+        self.exploration_rate = exploration_rate
+        self.window = window
+        self.min_observations = min_observations
+        self.max_error_rate = max_error_rate
+        self._random = random.Random(seed)
+        self._stats: Dict[Tuple[str, str, str], HandlerStats] = {}
+
+    def record(self, task: str, product_type: Optional[str], handler_name: str, latency: float,
+               success: bool, tokens: Optional[int]) -> None:
+        """
+        Records the outcome of a handler call, both for the product type and for the task as a whole.
+        Token counts are only used for successful calls.
+        """
+        for product_key in {self._product_key(product_type), ALL_PRODUCT_TYPES}:
+            key = (task, product_key, handler_name)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = HandlerStats(self.window)
+            stats.record(latency, success, tokens)
+
+    def rank(self, task: str, product_type: Optional[str]) -> List[str]:
+        """
+        Orders the candidate handlers for a task, preferred handler first and the rest as fallbacks.
+
+        Args:
+            task (str): The task to route.
+            product_type (Optional[str]): Product type of the item.
+
+        Returns:
+            List[str]: Handler names in the order in which they should be tried.
+        """
+        candidates = self.candidates.get(task) or list(self.handler_costs.keys())
+        # Unobserved handlers first (in configured order), then healthy and finally failing handlers by ascending score
+        ranked = sorted(
+            candidates,
+            key=lambda handler_name: self._sort_key(task, product_type, handler_name, candidates.index(handler_name))
+        )
+        if len(ranked) > 1 and self._random.random() < self.exploration_rate:
+            explored = self._random.choice(ranked[1:])
+            ranked.remove(explored)
+            ranked.insert(0, explored)
+            logging.debug(f"Exploring handler {explored} for task {task}")
+        return ranked
+
+    def score(self, task: str, product_type: Optional[str], handler_name: str) -> Optional[float]:
+        """
+        Returns the score of a handler, or None if it has not been observed often enough.
+        """
+        stats = self._observed_stats(task, product_type, handler_name)
+        if stats is None:
+            return None
+        latency, tokens = stats.mean_latency, stats.mean_tokens
+        if not stats.latencies:
+            # No successful calls to learn from; assume it would perform like the other handlers
+            latency, tokens = self._task_means(task, product_type)
+        elif not stats.tokens:
+            tokens = self._task_means(task, product_type)[1]
+        cost = self.handler_costs.get(handler_name, 0.0) * tokens / 1000
+        success_rate = max(1 - stats.error_rate, 0.05)
+        return (self.latency_weight * latency + self.cost_weight * cost) / success_rate
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Returns the rolling statistics and current score of each handler, keyed by task and product type.
+        """
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (task, product_key, handler_name), handler_stats in self._stats.items():
+            entry = handler_stats.to_dict()
+            score = self.score(task, None if product_key == ALL_PRODUCT_TYPES else product_key, handler_name)
+            entry["score"] = round(score, 6) if score is not None else None
+            stats.setdefault(task, {}).setdefault(product_key, {})[handler_name] = entry
+        return stats
+
+    def _sort_key(self, task: str, product_type: Optional[str], handler_name: str, position: int):
+        score = self.score(task, product_type, handler_name)
+        if score is None:
+            return (0, position, 0.0)
+        failing = self._observed_stats(task, product_type, handler_name).error_rate > self.max_error_rate
+        return (2 if failing else 1, score, position)
+
+    def _task_means(self, task: str, product_type: Optional[str]) -> Tuple[float, float]:
+        # Mean latency and tokens of the successful calls of all handlers for the task
+        for product_key in (self._product_key(product_type), ALL_PRODUCT_TYPES):
+            handler_stats = [self._stats[key] for key in self._stats if key[0] == task and key[1] == product_key]
+            latencies = [latency for stats in handler_stats for latency in stats.latencies]
+            tokens = [count for stats in handler_stats for count in stats.tokens]
+            if latencies:
+                return sum(latencies) / len(latencies), sum(tokens) / len(tokens) if tokens else 0.0
+        return 0.0, 0.0
+
+    def _observed_stats(self, task: str, product_type: Optional[str], handler_name: str) -> Optional[HandlerStats]:
+        # Prefer product type specific observations, fall back to the task as a whole
+        for product_key in (self._product_key(product_type), ALL_PRODUCT_TYPES):
+            stats = self._stats.get((task, product_key, handler_name))
+            if stats is not None and stats.count >= self.min_observations:
+                return stats
+        return None
+
+    @staticmethod
+    def _product_key(product_type: Optional[str]) -> str:
+        return " ".join(product_type.lower().split()) if product_type else ALL_PRODUCT_TYPES
@@ -0,0 +1,296 @@
+# entrypoint/near_duplicate_cache.py
+
+import hashlib
+import logging
+import random
+import re
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from models.llm_response_models import HandlerResult, EnrichmentResults
+
+COLORS = {
+    "black", "white", "blue", "red", "green", "yellow", "orange", "purple", "pink", "brown",
+    "grey", "gray", "navy", "beige", "maroon", "teal", "olive", "ivory", "cream", "khaki",
+    "charcoal", "burgundy", "tan", "gold", "silver", "turquoise", "lavender", "coral", "mint",
+}
+
+# Letter sizes ("M", "XL", "x-large") and numeric sizes ("10", "10.5", "8/10", "32x30")
+SIZE_VALUE = (r"(?:xxs|xs|s|m|l|xl|xxl|xxxl|[2-5]xl|small|medium|large|x-large|xx-large"
+              r"|\d+(?:[./]\d+)?(?:\s*x\s*\d+)?)")
+# "Size M", "size: 10.5", "Size 32x30"; "sizes", "sized" and "size and" are not size phrases
+SIZE_PHRASE_PATTERN = re.compile(r"\bsize(?:\s+|\s*[:\-]\s*)" + SIZE_VALUE + r"\b", re.IGNORECASE)
+# Bare size abbreviations that cannot be mistaken for ordinary words
+SIZE_TOKEN_PATTERN = re.compile(r"\b(xxs|xs|xl|xxl|xxxl|[2-5]xl)\b", re.IGNORECASE)
+COLOR_PATTERN = re.compile(r"\b(" + "|".join(sorted(COLORS)) + r")\b", re.IGNORECASE)
+POSSESSIVE_PATTERN = re.compile(r"'s\b", re.IGNORECASE)
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9]+")
+
+# Mersenne prime used for the MinHash permutations
+MERSENNE_PRIME = (1 << 61) - 1
+
+Variants = Dict[str, List[str]]
+
+
+def extract_variants(text: str) -> Variants:
+    """
+    Extracts the size and color tokens of an item, in order of first appearance.
+
+    Args:
+        text (str): Item text.
+
+    Returns:
+        Variants: Lists of the distinct "size" and "color" tokens.
+    """
+    phrases = list(SIZE_PHRASE_PATTERN.finditer(text))
+    # Bare tokens inside a size phrase ("XL" in "Size XL") are already covered by the phrase
+    tokens = [match for match in SIZE_TOKEN_PATTERN.finditer(text)
+              if not any(phrase.start() <= match.start() and match.end() <= phrase.end() for phrase in phrases)]
+    sizes = [match.group(0) for match in sorted(phrases + tokens, key=lambda match: match.start())]
+    colors = [match.group(0) for match in COLOR_PATTERN.finditer(text)]
+    return {"size": _unique(sizes), "color": _unique(colors)}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes item text for near-duplicate detection by stripping size and color tokens,
+    punctuation, case and redundant whitespace.
+    """
+    text = POSSESSIVE_PATTERN.sub("s", text)
+    text = SIZE_PHRASE_PATTERN.sub(" ", text)
+    text = SIZE_TOKEN_PATTERN.sub(" ", text)
+    text = COLOR_PATTERN.sub(" ", text)
+    return NON_WORD_PATTERN.sub(" ", text.lower()).strip()
+
+
+def _token_key(token: str) -> str:
+    return " ".join(token.lower().split())
+
+
+def _unique(tokens: List[str]) -> List[str]:
+    # Distinct tokens compared case-insensitively, keeping the casing of the first occurrence
+    unique = {}
+    for token in tokens:
+        unique.setdefault(_token_key(token), " ".join(token.split()))
+    return list(unique.values())
+
+
+def _variant_shape(kind: str, token: str) -> Optional[str]:
+    # What a variant token is, or None if it is not an actual size or color token
+    if kind == "size":
+        if SIZE_PHRASE_PATTERN.fullmatch(token):
+            return "size phrase"
+        if SIZE_TOKEN_PATTERN.fullmatch(token):
+            return "size token"
+    elif kind == "color" and COLOR_PATTERN.fullmatch(token):
+        return "color"
+    return None
+
+
+def _match_case(source: str, replacement: str) -> str:
+    if source.islower():
+        return replacement.lower()
+    if source.isupper():
+        return replacement.upper()
+    if source[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class _Entry:
+    __slots__ = ("product_type", "signature", "band_keys", "variants", "results")
+
+    def __init__(self, product_type: str, signature: array, band_keys: List[int], variants: Variants,
+                 results: EnrichmentResults):
+        self.product_type = product_type
+        self.signature = signature
+        self.band_keys = band_keys
+        self.variants = variants
+        self.results = results
+
+
+class NearDuplicateCache:
+    """
+    Reuses enrichments of previously seen items that differ only by size/color or minor wording.
+
+    Items are compared within their product type using MinHash signatures over word shingles of the
+    normalized item text, with locality-sensitive hashing (LSH) bands to find candidates. The number of
+    cached items is bounded and the least recently used items are evicted first.
+    """
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 max_entries: int = 10000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # product type -> band index -> band key -> entry ids
+        self._index: Dict[str, List[Dict[int, Set[int]]]] = {}
+        self._next_id = 0
+        self._stats = {"lookups": 0, "hits": 0, "templated_hits": 0, "misses": 0, "insertions": 0, "evictions": 0}
+
+    def lookup(self, item_title: str, short_description: str, long_description: str,
+               product_type: str) -> Optional[EnrichmentResults]:
+        """
+        Finds a previously enriched near-duplicate item and adapts its results to this item.
+
+        Args:
+            item_title (str): Original item title.
+            short_description (str): Original short description.
+            long_description (str): Original long description.
+            product_type (str): Product type of the item.
+
+        Returns:
+            Optional[EnrichmentResults]: The reused results, or None if no near-duplicate was found.
+        """
+        self._stats["lookups"] += 1
+        text = "\n".join((item_title, short_description, long_description))
+        signature = self._signature(normalize_text(text))
+        entry_id, similarity = self._best_match(self._product_key(product_type), signature)
+        if entry_id is None:
+            self._stats["misses"] += 1
+            return None
+
+        entry = self._entries[entry_id]
+        variants = extract_variants(text)
+        replacements = self._replacements(entry.variants, variants)
+        if replacements is None:
+            logging.debug(f"Near-duplicate found (similarity {similarity:.2f}) but its variants cannot be templated")
+            self._stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(entry_id)
+        self._stats["hits"] += 1
+        if replacements:
+            self._stats["templated_hits"] += 1
+        logging.info(f"Reusing enrichment of near-duplicate item (similarity {similarity:.2f}, "
+                     f"{len(replacements)} variant replacements)")
+        return {
+            task: [
+                HandlerResult(
+                    handler_name=result.handler_name,
+                    model=result.model,
+                    response=self._apply(result.response, replacements),
+                    success=result.success,
+                    error=result.error
+                )
+                for result in task_results
+            ]
+            for task, task_results in entry.results.items()
+        }
+
+    def add(self, item_title: str, short_description: str, long_description: str, product_type: str,
+            results: EnrichmentResults) -> None:
+        """
+        Caches the successful results of an enriched item. Items with a task that failed on every
+        handler are not cached.
+        """
+        successful = {task: [result for result in task_results if result.success]
+                      for task, task_results in results.items()}
+        if not successful or not all(successful.values()):
+            return
+
+        text = "\n".join((item_title, short_description, long_description))
+        product_key = self._product_key(product_type)
+        signature = self._signature(normalize_text(text))
+        band_keys = self._band_keys(signature)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = _Entry(product_key, signature, band_keys, extract_variants(text), successful)
+        bands = self._index.setdefault(product_key, [{} for _ in range(self.bands)])
+        for band, key in enumerate(band_keys):
+            bands[band].setdefault(key, set()).add(entry_id)
+        self._stats["insertions"] += 1
+
+        while len(self._entries) > self.max_entries:
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+    def _evict(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        bands = self._index[entry.product_type]
+        for band, key in enumerate(entry.band_keys):
+            bucket = bands[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del bands[band][key]
+        self._stats["evictions"] += 1
+
+    def _best_match(self, product_key: str, signature: array) -> Tuple[Optional[int], float]:
+        bands = self._index.get(product_key)
+        if not bands:
+            return None, 0.0
+        candidates: Set[int] = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(bands[band].get(key, ()))
+
+        best_id, best_similarity = None, 0.0
+        for entry_id in candidates:
+            other = self._entries[entry_id].signature
+            similarity = sum(1 for a, b in zip(signature, other) if a == b) / self.num_perm
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+        return best_id, best_similarity
+
+    def _signature(self, normalized: str) -> array:
+        words = normalized.split()
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+                  for shingle in shingles]
+        return array("Q", (min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._permutations))
+
+    def _band_keys(self, signature: array) -> List[int]:
+        return [hash(tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    @staticmethod
+    def _product_key(product_type: str) -> str:
+        return " ".join(product_type.lower().split())
+
+    @staticmethod
+    def _replacements(source: Variants, target: Variants) -> Optional[List[Tuple[str, str]]]:
+        """
+        Pairs the size/color tokens of the cached item with those of the new item by order of appearance.
+        Returns None if the tokens cannot be paired one to one, or if a pair would replace anything other
+        than a size/color token with one of the same shape (e.g. "Size XL" with a bare "L").
+        """
+        replacements = []
+        for kind, source_tokens in source.items():
+            target_tokens = target.get(kind, [])
+            if len(source_tokens) != len(target_tokens):
+                return None
+            for old, new in zip(source_tokens, target_tokens):
+                if _token_key(old) == _token_key(new):
+                    continue
+                shape = _variant_shape(kind, old)
+                if shape is None or shape != _variant_shape(kind, new):
+                    return None
+                replacements.append((old, new))
+        return replacements
+
+    @staticmethod
+    def _apply(response: Optional[str], replacements: List[Tuple[str, str]]) -> Optional[str]:
+        if not response or not replacements:
+            return response
+        # Substitute all tokens in a single pass so that swapped variants do not interfere
+        mapping = {_token_key(old): new for old, new in replacements}
+        pattern = re.compile(r"\b(" + "|".join(re.escape(old).replace(r"\ ", r"\s+") for old, _ in replacements) + r")\b",
+                             re.IGNORECASE)
+        return pattern.sub(lambda match: _match_case(match.group(0), mapping[_token_key(match.group(0))]), response)
@@ -7,6 +7,7 @@ import re  # Import the regex module
 import difflib  # Import difflib for fuzzy matching
 
 from typing import List, Dict, Any
+from common.tracing import tracer
 
 class PromptManager:
     _instance = None
@@ -62,7 +63,8 @@ class PromptManager:
         styling_guide = self.styling_guide_cache.get(product_type)
         if not styling_guide:
             # Perform fuzzy matching
-            closest_matches = difflib.get_close_matches(product_type, self.styling_guide_cache.keys(), n=1, cutoff=0.6)
+            with tracer.span("fuzzy_match", product_type=product_type):
+                closest_matches = difflib.get_close_matches(product_type, self.styling_guide_cache.keys(), n=1, cutoff=0.6)
             if closest_matches:
                 closest_match = closest_matches[0]
                 logging.info(f"Fuzzy matched '{product_type}' to '{closest_match}'")
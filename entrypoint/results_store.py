@@ -0,0 +1,227 @@
+# entrypoint/results_store.py
+
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from models.llm_response_models import HandlerResult, EnrichmentResults
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS enrichment_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_hash TEXT NOT NULL,
+    item_id TEXT,
+    product_type TEXT,
+    task TEXT NOT NULL,
+    handler_name TEXT NOT NULL,
+    model TEXT,
+    response TEXT,
+    success INTEGER NOT NULL,
+    error TEXT,
+    latency_ms REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_item_hash ON enrichment_results (item_hash, task, handler_name);
+CREATE INDEX IF NOT EXISTS idx_results_item_id ON enrichment_results (item_id);
+CREATE INDEX IF NOT EXISTS idx_results_product_type ON enrichment_results (product_type, task, handler_name);
+"""
+
+COLUMNS = ("item_hash", "item_id", "product_type", "task", "handler_name", "model", "response", "success",
+           "error", "latency_ms", "prompt_tokens", "completion_tokens", "created_at")
+
+# Columns that can be used to filter stored results
+FILTER_COLUMNS = ("item_hash", "item_id", "product_type", "task", "handler_name", "model")
+
+_STOP = object()
+
+
+def compute_item_hash(*fields: str) -> str:
+    """
+    Computes a stable hash identifying an item by its content, ignoring case and whitespace differences.
+
+    Args:
+        *fields (str): Item fields, e.g. title, short description, long description and product type.
+
+    Returns:
+        str: Hex encoded SHA-256 digest.
+    """
+    normalized = [" ".join((field or "").lower().split()) for field in fields]
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ResultRecord:
+    """
+    A single completed handler call for an item.
+    """
+    __slots__ = COLUMNS
+
+    item_hash: str
+    item_id: Optional[str]
+    product_type: Optional[str]
+    task: str
+    handler_name: str
+    model: str
+    response: Optional[str]
+    success: bool
+    error: Optional[str]
+    latency_ms: float
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+    created_at: float
+
+
+class ResultsStore:
+    """
+    Append-only SQLite store of enrichment results, indexed by item hash, item id and product type.
+
+    Records are written by a background thread in batches so that recording a result never blocks the
+    event loop; lookups use their own connection.
+    """
+    def __init__(self, path: str = "enrichment_results.db", batch_size: int = 100, max_pending: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+        self._read_connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._read_connection.row_factory = sqlite3.Row
+        self._read_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="ResultsStoreWriter", daemon=True)
+        self._writer.start()
+        logging.info(f"Results store opened at {self.path}")
+
+    def record(self, record: ResultRecord) -> None:
+        """
+        Queues a record for writing. Records are dropped (and logged) if the writer falls too far behind.
+        """
+        try:
+            self._pending.put_nowait(record)
+        except queue.Full:
+            logging.error(f"Results store queue is full, dropping result for item {record.item_hash} task {record.task}")
+
+    def latest_results(self, item_hash: str) -> EnrichmentResults:
+        """
+        Returns the most recent successful result of each (task, handler) for an item.
+
+        Args:
+            item_hash (str): Hash of the item as returned by compute_item_hash.
+
+        Returns:
+            EnrichmentResults: Results keyed by task, most recently completed handler first.
+        """
+        rows = self._query(
+            "SELECT task, handler_name, model, response FROM enrichment_results "
+            "WHERE id IN (SELECT MAX(id) FROM enrichment_results WHERE item_hash = ? AND success = 1 "
+            "GROUP BY task, handler_name) ORDER BY id DESC",
+            (item_hash,)
+        )
+        results: EnrichmentResults = {}
+        for row in rows:
+            results.setdefault(row["task"], []).append(HandlerResult(
+                handler_name=row["handler_name"],
+                model=row["model"],
+                response=row["response"],
+                success=True,
+                error=None
+            ))
+        return results
+
+    def find(self, limit: int = 100, **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Returns stored results matching the given filters, most recent first.
+
+        Args:
+            limit (int): Maximum number of results to return, at least 1.
+            **filters: Column values to match, see FILTER_COLUMNS. None values are ignored.
+
+        Returns:
+            List[Dict[str, Any]]: The matching results.
+        """
+        if limit < 1:
+            # SQLite treats a negative LIMIT as no limit
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        conditions = []
+        parameters: List[Any] = []
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Unsupported filter: {column}")
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._query(
+            f"SELECT id, {', '.join(COLUMNS)} FROM enrichment_results {where}ORDER BY id DESC LIMIT ?",
+            (*parameters, limit)
+        )
+        return [dict(row, success=bool(row["success"])) for row in rows]
+
+    def close(self) -> None:
+        """
+        Writes all queued records and closes the store.
+        """
+        self._pending.put(_STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._read_connection.close()
+
+    def _query(self, sql: str, parameters: tuple) -> List[sqlite3.Row]:
+        with self._read_lock:
+            return self._read_connection.execute(sql, parameters).fetchall()
+
+    def _write_loop(self) -> None:
+        connection = sqlite3.connect(self.path)
+        insert = f"INSERT INTO enrichment_results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        stopping = False
+        while not stopping:
+            batch = [self._pending.get()]
+            # Drain whatever else is already queued into the same transaction
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+            if not batch:
+                continue
+            try:
+                with connection:
+                    connection.executemany(insert, [
+                        tuple(getattr(record, column) for column in COLUMNS) for record in batch
+                    ])
+            except sqlite3.Error as e:
+                logging.error(f"Error writing {len(batch)} results to the results store: {str(e)}")
+        connection.close()
+
+
+def create_record(item_hash: str, item_id: Optional[str], product_type: Optional[str], task: str,
+                  result: HandlerResult, latency: float, usage: Optional[Dict[str, int]] = None) -> ResultRecord:
+    usage = usage or {}
+    return ResultRecord(
+        item_hash=item_hash,
+        item_id=item_id,
+        product_type=product_type,
+        task=task,
+        handler_name=result.handler_name,
+        model=result.model,
+        response=result.response,
+        success=result.success,
+        error=result.error,
+        latency_ms=latency * 1000,
+        prompt_tokens=usage.get("prompt_tokens"),
+        completion_tokens=usage.get("completion_tokens"),
+        created_at=time.time()
+    )
@@ -7,3 +7,14 @@ class StylingGuideNotFoundException(Exception):
     def __init__(self, product_type):
         self.product_type = product_type
         super().__init__(f"No styling guides found for product type: {product_type}")
+
+
+class AdmissionRejectedException(Exception):
+    """
+    Exception raised when a request is not admitted because the service is saturated.
+    """
+    def __init__(self, status_code, retry_after, reason):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"Request rejected: {reason}. Retry after {retry_after} seconds")
@@ -1,9 +1,11 @@
 import logging
 from typing import Dict, Any
 import asyncio
+import time
 from models.llm_request_models import BaseLLMRequest
 from openai import RateLimitError, AuthenticationError, OpenAIError, APIConnectionError, Timeout
 from providers.provider_factory import ProviderFactory
+from common.tracing import tracer
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
@@ -29,20 +31,23 @@ class BaseModelHandler:
     async def _retry_logic(self, model: str, prompt: str, temperature: float, max_tokens: int, task: str, retries: int) -> Dict[str, Any]:
         for attempt in range(retries):
             try:
-                response = await asyncio.to_thread(
-                    self.provider.create_chat_completion,
-                    model,
-                    [{"role": "user", "content": prompt}],
-                    temperature,
-                    max_tokens
-                )
+                with tracer.span("llm_attempt", task=task, model=model, attempt=attempt + 1):
+                    response = await asyncio.to_thread(
+                        self._create_chat_completion,
+                        time.perf_counter(),
+                        model,
+                        [{"role": "user", "content": prompt}],
+                        temperature,
+                        max_tokens
+                    )
                 self.logger.debug("Received response: %s", response)
                 content = response['choices'][0]['message']['content']
-                return {"task": task, "response": content}
+                return {"task": task, "response": content, "usage": response.get('usage')}
             except (APIConnectionError, Timeout) as e:
                 self.logger.warning("Network-related error during model invocation, attempt %d/%d: %s", attempt + 1, retries, str(e))
                 if attempt < retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+                    with tracer.span("retry_backoff", task=task, attempt=attempt + 1):
+                        await asyncio.sleep(2 ** attempt)
                     continue
                 else:
                     self.logger.error("Failed after %d attempts: %s", retries, str(e))
@@ -53,3 +58,9 @@ class BaseModelHandler:
             except Exception as e:
                 self.logger.error(f"Caught an unexpected exception: {type(e)} - {str(e)}")
                 raise
+
+    def _create_chat_completion(self, submitted_at: float, model: str, messages: list, temperature: float, max_tokens: int):
+        # Runs on the executor thread; the gap since submission is time spent queued for a worker
+        tracer.record_span("executor_queue_wait", submitted_at, time.perf_counter(), model=model)
+        with tracer.span("provider_call", provider=self.provider_name, model=model):
+            return self.provider.create_chat_completion(model, messages, temperature, max_tokens)
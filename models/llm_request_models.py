@@ -20,6 +20,8 @@ class LLMRequest(BaseModel):
     Attributes:
         metadata (Dict[str, Union[str, int, float, List[str]]]): A dictionary containing metadata about the item to be enriched.
         tasks (List[str]): A list of tasks to be performed on the metadata by the LLMs.
+        item_id (Optional[str]): Identifier of the item, used to look up stored results.
+        refresh (bool): Recompute the enrichment even if stored results exist for the item.
     """
     item_title: str
     short_description: str
@@ -27,6 +29,8 @@ class LLMRequest(BaseModel):
     item_product_type: str
     metadata: Optional[Dict[str, Union[str, int, float, List[str]]]] = None
     tasks: Optional[List[str]] = None
+    item_id: Optional[str] = None
+    refresh: bool = False
     
 class GPT4Request(BaseLLMRequest):
     """
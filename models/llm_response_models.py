@@ -0,0 +1,28 @@
+# llm_response_models.py
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+@dataclass
+class HandlerResult:
+    """
+    Result of invoking a single handler for a single task.
+
+    Slotted so that large bulk responses stay compact and serialize without a per-instance __dict__.
+
+    Attributes:
+        handler_name (str): Name of the handler as configured in providers/config.json.
+        model (str): Model used by the handler.
+        response (Optional[str]): The LLM response, None if the invocation failed.
+        success (bool): Whether the invocation succeeded.
+        error (Optional[str]): The error message if the invocation failed.
+    """
+    __slots__ = ("handler_name", "model", "response", "success", "error")
+
+    handler_name: str
+    model: str
+    response: Optional[str]
+    success: bool
+    error: Optional[str]
+
+# Results of an enrichment, keyed by task name
+EnrichmentResults = Dict[str, List[HandlerResult]]
@@ -102,6 +102,7 @@ async def performance_test():
     for provider_config in provider_configs['providers']:
         provider_config_copy = provider_config.copy()
         name = provider_config_copy.pop('name')
+        provider_config_copy.pop('cost_per_1k_tokens', None)
         handlers[name] = BaseModelHandler(**provider_config_copy)
 
     # Load prompts from CSV
@@ -19,7 +19,14 @@ class OpenAIProvider(BaseProvider):
                 max_tokens=max_tokens
             )
             content = response.choices[0].message.content
-            return {"choices": [{"message": {"content": content}}]}
+            result = {"choices": [{"message": {"content": content}}]}
+            if response.usage is not None:
+                result["usage"] = {
+                    "prompt_tokens": response.usage.prompt_tokens,
+                    "completion_tokens": response.usage.completion_tokens,
+                    "total_tokens": response.usage.total_tokens
+                }
+            return result
         except Exception as e:
             self.logger.error("Error creating OpenAI chat completion: %s", str(e))
             raise
\ No newline at end of file
@@ -6,6 +6,12 @@ import time
 import json
 from datetime import datetime
 import sys
+import os
+from entrypoint.results_store import ResultsStore, compute_item_hash, create_record
+from models.llm_response_models import HandlerResult
+
+# Optionally record every result as it completes so that runs can be compared later
+results_store = ResultsStore(os.environ["RESULTS_STORE_PATH"]) if os.getenv("RESULTS_STORE_PATH") else None
 
 async def process_prompt_task_pair(prompt, task, handlers):
     request = BaseLLMRequest(prompt=prompt)
@@ -39,6 +45,7 @@ async def invoke_handler(handler_name, handler, request, task):
             "elapsed_time": elapsed_time
         }
         print(f"{handler_name} ({handler.provider_name}, model: {handler.model}) response for prompt '{request.prompt}':\n{response['response']}\nElapsed time: {elapsed_time:.2f} seconds\n")
+        record_result(handler_name, handler, request, task, response['response'], None, elapsed_time, response.get('usage'))
     except Exception as e:
         elapsed_time = time.time() - start_time
         print(f"Error during {handler_name} invocation for prompt '{request.prompt}': {str(e)}\nElapsed time: {elapsed_time:.2f} seconds\n")
@@ -51,8 +58,16 @@ async def invoke_handler(handler_name, handler, request, task):
             "error": str(e),
             "elapsed_time": elapsed_time
         }
+        record_result(handler_name, handler, request, task, None, str(e), elapsed_time, None)
     return result
 
+def record_result(handler_name, handler, request, task, response, error, elapsed_time, usage):
+    if results_store is None:
+        return
+    result = HandlerResult(handler_name=handler_name, model=handler.model, response=response,
+                           success=error is None, error=error)
+    results_store.record(create_record(compute_item_hash(request.prompt), None, None, task, result, elapsed_time, usage))
+
 async def test_providers_with_csv():
     # Get CSV file name from command-line argument or use default
     csv_file = sys.argv[1] if len(sys.argv) > 1 else 'attribute_extraction_prompts.csv'
@@ -69,6 +84,7 @@ async def test_providers_with_csv():
     for provider_config in provider_configs['providers']:
         provider_config_copy = provider_config.copy()
         name = provider_config_copy.pop('name')
+        provider_config_copy.pop('cost_per_1k_tokens', None)
         handlers[name] = BaseModelHandler(**provider_config_copy)    
 
     all_results = []
@@ -89,6 +105,9 @@ async def test_providers_with_csv():
         json.dump(all_results, f, indent=4)
 
     print(f"Responses have been saved to '{output_filename}'")
+    if results_store is not None:
+        results_store.close()
+        print(f"Responses have been recorded in '{results_store.path}'")
 
 # Run the test if executed as a script
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# Modules import each other relative to the project root (e.g. `from entrypoint.llm_manager import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,69 @@
+# test_model_router.py
+from entrypoint.model_router import ModelRouter
+
+HANDLER_COSTS = {"openai": 0.0006, "runpod_vllm1": 0.0001, "runpod_vllm2": 0.0002}
+
+
+def make_router(**kwargs):
+    return ModelRouter(handler_costs=HANDLER_COSTS, exploration_rate=0.0, seed=1, **kwargs)
+
+
+def test_unobserved_handlers_are_ranked_first_in_configured_order():
+    router = make_router()
+    for _ in range(3):
+        router.record("title_enhancement", "T-Shirts", "openai", 2.0, True, 400)
+
+    assert router.rank("title_enhancement", "T-Shirts") == ["runpod_vllm1", "runpod_vllm2", "openai"]
+
+
+def test_faster_and_cheaper_handler_is_preferred():
+    router = make_router()
+    for _ in range(3):
+        router.record("title_enhancement", "T-Shirts", "openai", 2.0, True, 400)
+        router.record("title_enhancement", "T-Shirts", "runpod_vllm1", 0.5, True, 400)
+        router.record("title_enhancement", "T-Shirts", "runpod_vllm2", 1.0, True, 400)
+
+    assert router.rank("title_enhancement", "T-Shirts") == ["runpod_vllm1", "runpod_vllm2", "openai"]
+
+
+def test_failing_handler_is_ranked_after_healthy_handlers():
+    router = make_router()
+    for _ in range(3):
+        # Failures are fast and report no tokens
+        router.record("title_enhancement", "T-Shirts", "runpod_vllm2", 0.05, False, None)
+        router.record("title_enhancement", "T-Shirts", "openai", 2.0, True, 400)
+        router.record("title_enhancement", "T-Shirts", "runpod_vllm1", 3.0, True, 400)
+
+    assert router.rank("title_enhancement", "T-Shirts") == ["openai", "runpod_vllm1", "runpod_vllm2"]
+
+
+def test_handler_without_successes_is_scored_from_task_means():
+    router = make_router()
+    for _ in range(3):
+        router.record("title_enhancement", "T-Shirts", "runpod_vllm2", 0.05, False, None)
+        router.record("title_enhancement", "T-Shirts", "openai", 2.0, True, 400)
+
+    # Task-wide mean latency (2.0 s) and tokens (400 at 0.0002/1k) divided by the 0.05 success floor
+    expected = (2.0 + 100.0 * 0.0002 * 400 / 1000) / 0.05
+    assert abs(router.score("title_enhancement", "T-Shirts", "runpod_vllm2") - expected) < 1e-9
+    assert router.score("title_enhancement", "T-Shirts", "runpod_vllm2") > router.score("title_enhancement", "T-Shirts", "openai")
+
+
+def test_failed_calls_do_not_lower_latency_or_token_estimates():
+    router = make_router(min_observations=1)
+    router.record("title_enhancement", None, "openai", 2.0, True, 1000)
+    router.record("title_enhancement", None, "openai", 0.01, False, None)
+
+    stats = router.stats()["title_enhancement"]["*"]["openai"]
+    assert stats["mean_latency"] == 2.0
+    assert stats["mean_tokens"] == 1000
+    assert stats["error_rate"] == 0.5
+
+
+def test_exploration_can_reprobe_failing_handler():
+    router = ModelRouter(handler_costs={"openai": 0.0006, "runpod_vllm2": 0.0002}, exploration_rate=1.0, seed=1)
+    for _ in range(3):
+        router.record("title_enhancement", None, "runpod_vllm2", 0.05, False, None)
+        router.record("title_enhancement", None, "openai", 2.0, True, 400)
+
+    assert router.rank("title_enhancement", None) == ["runpod_vllm2", "openai"]
@@ -0,0 +1,96 @@
+# test_near_duplicate_cache.py
+from entrypoint.near_duplicate_cache import NearDuplicateCache, extract_variants, normalize_text
+from models.llm_response_models import HandlerResult
+
+SHORT_DESCRIPTION = "Soft cotton crew neck tee, perfect for everyday wear."
+LONG_DESCRIPTION = "Made of 100% cotton jersey with a classic fit and a ribbed collar that keeps its shape."
+
+
+def make_results(response):
+    return {"title_enhancement": [HandlerResult("openai", "gpt-4o-mini", response, True, None)]}
+
+
+def lookup_response(cache, title, short_description=SHORT_DESCRIPTION, long_description=LONG_DESCRIPTION):
+    results = cache.lookup(title, short_description, long_description, "T-Shirts")
+    return results["title_enhancement"][0].response if results else None
+
+
+def test_extract_variants_ignores_words_that_are_not_sizes():
+    variants = extract_variants("Size M tee, true to size and breathable, sized for comfort in multiple sizes")
+    assert variants == {"size": ["Size M"], "color": []}
+
+
+def test_extract_variants_does_not_double_count_tokens_inside_phrases():
+    assert extract_variants("Men's T-Shirt, Blue, Size XL")["size"] == ["Size XL"]
+    assert extract_variants("Size: 10.5 or size 32x30, also XS")["size"] == ["Size: 10.5", "size 32x30", "XS"]
+
+
+def test_normalize_text_strips_size_and_color_tokens():
+    assert normalize_text("Men's T-Shirt, Blue, Size XL") == normalize_text("Men's T-Shirt, Red, Size L")
+
+
+def test_lookup_templates_size_and_color():
+    cache = NearDuplicateCache()
+    cache.add("Men's T-Shirt, Blue, Size XL", SHORT_DESCRIPTION, LONG_DESCRIPTION, "T-Shirts",
+              make_results("Classic Cotton Tee - Blue, Size XL"))
+
+    assert lookup_response(cache, "Men's T-Shirt, Red, Size L") == "Classic Cotton Tee - Red, Size L"
+    assert cache.stats()["templated_hits"] == 1
+
+
+def test_lookup_does_not_replace_ordinary_words():
+    # Variants are paired by order of appearance; "size and" must not be mistaken for a size
+    cache = NearDuplicateCache(threshold=0.5)
+    cache.add("Men's T-Shirt", SHORT_DESCRIPTION, LONG_DESCRIPTION + " Size M, true to size and breathable.",
+              "T-Shirts", make_results("Size M crew neck, true to size and breathable."))
+
+    response = lookup_response(cache, "Men's T-Shirt",
+                               long_description=LONG_DESCRIPTION + " True to size and breathable, Size L.")
+    assert response == "Size L crew neck, true to size and breathable."
+
+
+def test_lookup_with_plural_sizes_only_replaces_the_size_phrase():
+    cache = NearDuplicateCache(threshold=0.5)
+    cache.add("Men's T-Shirt", SHORT_DESCRIPTION, LONG_DESCRIPTION + " This Size M tee comes in multiple sizes.",
+              "T-Shirts", make_results("Offered in multiple sizes. This Size M tee is a staple."))
+
+    response = lookup_response(cache, "Men's T-Shirt",
+                               long_description=LONG_DESCRIPTION + " Offered in multiple sizes, this is the Size L tee.")
+    assert response == "Offered in multiple sizes. This Size L tee is a staple."
+
+
+def test_lookup_misses_when_variants_cannot_be_paired():
+    cache = NearDuplicateCache()
+    cache.add("Men's T-Shirt, Blue, Size XL", SHORT_DESCRIPTION, LONG_DESCRIPTION, "T-Shirts",
+              make_results("Classic Cotton Tee - Blue, Size XL"))
+
+    # A phrase ("Size XL") cannot be paired with a bare token ("L")
+    assert lookup_response(cache, "Men's T-Shirt, Blue, XS") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_lookup_is_scoped_to_product_type():
+    cache = NearDuplicateCache()
+    cache.add("Men's T-Shirt, Blue", SHORT_DESCRIPTION, LONG_DESCRIPTION, "T-Shirts", make_results("Tee"))
+
+    assert cache.lookup("Men's T-Shirt, Blue", SHORT_DESCRIPTION, LONG_DESCRIPTION, "Hoodies") is None
+
+
+def test_add_skips_items_with_a_task_that_failed_everywhere():
+    cache = NearDuplicateCache()
+    cache.add("Men's T-Shirt, Blue", SHORT_DESCRIPTION, LONG_DESCRIPTION, "T-Shirts",
+              {"title_enhancement": [HandlerResult("openai", "gpt-4o-mini", None, False, "timeout")]})
+
+    assert cache.stats()["insertions"] == 0
+
+
+def test_cache_evicts_least_recently_used_entries():
+    cache = NearDuplicateCache(max_entries=2)
+    for index in range(3):
+        cache.add(f"Item {index} with a distinct title", f"Description {index}", f"Long description {index}",
+                  "T-Shirts", make_results(f"Response {index}"))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert cache.lookup("Item 0 with a distinct title", "Description 0", "Long description 0", "T-Shirts") is None
@@ -0,0 +1,45 @@
+# test_tracing.py
+import asyncio
+import time
+
+from common.tracing import Tracer, NoOpExporter
+
+
+def test_nested_spans_inherit_labels_across_executor_threads():
+    tracer = Tracer(exporter=NoOpExporter())
+
+    def provider_call(submitted_at):
+        tracer.record_span("executor_queue_wait", submitted_at, time.perf_counter(), model="gpt-4o-mini")
+        with tracer.span("provider_call", provider="openai", model="gpt-4o-mini"):
+            pass
+
+    async def handle():
+        with tracer.start_trace("enrich_item") as trace:
+            with tracer.span("handler_call", task="title_enhancement", handler="openai"):
+                with tracer.span("llm_attempt", task="title_enhancement", model="gpt-4o-mini", attempt=1):
+                    await asyncio.to_thread(provider_call, time.perf_counter())
+        return trace
+
+    trace = asyncio.run(handle())
+    labels = {span.name: span.label for span in trace.spans}
+
+    assert labels == {
+        "handler_call": "title_enhancement/openai",
+        "llm_attempt": "title_enhancement/openai/1",
+        "executor_queue_wait": "title_enhancement/openai/1",
+        "provider_call": "title_enhancement/openai/1",
+    }
+    assert 'provider_call;desc="title_enhancement/openai/1"' in trace.server_timing()
+
+
+def test_span_attributes_take_precedence_over_enclosing_spans():
+    tracer = Tracer(exporter=NoOpExporter())
+    with tracer.start_trace("enrich_item") as trace:
+        with tracer.span("handler_call", task="title_enhancement", handler="openai"):
+            with tracer.span("handler_call", task="title_enhancement", handler="runpod_vllm1"):
+                pass
+        with tracer.span("generate_prompts"):
+            pass
+
+    assert [span.label for span in trace.spans] == ["title_enhancement/openai", "title_enhancement/runpod_vllm1", ""]
+    assert trace.spans[1].parent_id == trace.spans[0].span_id